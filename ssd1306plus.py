@@ -4,7 +4,7 @@
 # v1.0.0 - initial
 
 from micropython import const
-import framebuf, gc
+import array, framebuf, gc, micropython
 
 
 # register definitions
@@ -27,6 +27,165 @@ SET_PRECHARGE = const(0xD9)
 SET_VCOM_DESEL = const(0xDB)
 SET_CHARGE_PUMP = const(0x8D)
 
+# GIF block types and packed field bits
+_GIF_TRAILER = const(0x3B)
+_GIF_EXT = const(0x21)
+_GIF_IMG = const(0x2C)
+_GIF_GCE = const(0xF9)  # extension label: Graphics Control Extension
+_GCE_TRANS = const(0x01)  # GCE has a transparent colour index
+_CT_FLAG = const(0x80)  # screen/image descriptor has a colour table
+_INTERLACE = const(0x40)
+_CT_SIZE_MASK = const(0x07)
+
+
+# Sub-block reader state for _read_code, kept in an array('i')
+_RD_POS = const(0)  # next byte of data to read
+_RD_LEFT = const(1)  # bytes left in the current sub-block
+_RD_ACC = const(2)  # bit accumulator, next code in the low bits
+_RD_NBITS = const(3)  # valid bits in the accumulator
+_RD_END = const(4)  # length of data
+_RD_LEN = const(5)
+
+
+# Read one LZW code of code_size bits (GIF packs codes LSB first) straight
+# from the image data sub-blocks in data, stepping over the length bytes as
+# they come up. A 12-bit code needs at most 2 more bytes in the accumulator.
+# Returns -1 at the block terminator or the end of data.
+@micropython.viper
+def _read_code(data: ptr8, rd: ptr32, code_size: int) -> int:
+    acc = rd[_RD_ACC]
+    nbits = rd[_RD_NBITS]
+    if nbits < code_size:
+        pos = rd[_RD_POS]
+        left = rd[_RD_LEFT]
+        end = rd[_RD_END]
+        while nbits < code_size:
+            if left == 0:
+                if pos >= end:
+                    return -1
+                left = data[pos]
+                pos += 1
+                if left == 0:
+                    return -1
+            if pos >= end:
+                return -1
+            acc |= data[pos] << nbits
+            pos += 1
+            left -= 1
+            nbits += 8
+        rd[_RD_POS] = pos
+        rd[_RD_LEFT] = left
+    rd[_RD_ACC] = acc >> code_size
+    rd[_RD_NBITS] = nbits - code_size
+    return acc & ((1 << code_size) - 1)
+
+
+# GIF frame parameters for _blit_run, kept in an array('i') so the viper
+# function stays within four arguments
+_FR_W = const(0)  # frame width
+_FR_X0 = const(1)  # display position of the frame's top left pixel
+_FR_Y0 = const(2)
+_FR_FX0 = const(3)  # visible part of the frame in frame coordinates, inclusive
+_FR_FY0 = const(4)
+_FR_FX1 = const(5)
+_FR_FY1 = const(6)
+_FR_STOP = const(7)  # pixels to decode, up to the last visible row
+_FR_RUN_END = const(8)  # end index of the run being drawn
+_FR_POS = const(9)  # pixels drawn so far
+_FR_XX = const(10)  # frame column of the next pixel
+_FR_YY = const(11)  # frame row of the next pixel
+_FR_ROWS = const(12)  # one entry per display row: byte offset << 8 | bit mask
+
+# The display is 1-bit, so colour indices are mapped to one of these when the
+# LZW dictionary is set up and the drawing code never sees the palette
+_PIX_KEEP = const(0)  # transparent, leave the existing pixel as-is
+_PIX_ON = const(1)
+_PIX_OFF = const(2)  # background colour
+
+
+# Draw pixel classes run[start:fr[_FR_RUN_END]] as the next pixels of a GIF
+# frame into a MONO_VLSB buffer, stopping at fr[_FR_STOP]. The run is
+# walked one frame row at a time and each row is clipped to the visible box
+# up front, so no per-pixel bounds checks are needed.
+# Returns the number of frame pixels drawn so far.
+@micropython.viper
+def _blit_run(buf: ptr8, run: ptr8, start: int, fr: ptr32) -> int:
+    pos = fr[_FR_POS]
+    stop = start + fr[_FR_STOP] - pos
+    if stop > fr[_FR_RUN_END]:
+        stop = fr[_FR_RUN_END]
+    fw = fr[_FR_W]
+    fx0 = fr[_FR_FX0]
+    fy0 = fr[_FR_FY0]
+    fx1 = fr[_FR_FX1] + 1
+    fy1 = fr[_FR_FY1]
+    xx = fr[_FR_XX]
+    yy = fr[_FR_YY]
+    i = start
+    while i < stop:
+        # part of the run that lies on frame row yy
+        n = fw - xx
+        if n > stop - i:
+            n = stop - i
+        if yy >= fy0 and yy <= fy1:
+            a = xx
+            if a < fx0:
+                a = fx0
+            b = xx + n
+            if b > fx1:
+                b = fx1
+            if a < b:
+                row = fr[_FR_ROWS + fr[_FR_Y0] + yy]
+                byte = (row >> 8) + fr[_FR_X0] + a
+                bit = row & 0xFF
+                for k in range(i + a - xx, i + b - xx):
+                    v = run[k]
+                    if v == _PIX_ON:
+                        buf[byte] = buf[byte] | bit
+                    elif v == _PIX_OFF:
+                        buf[byte] = buf[byte] & (bit ^ 0xFF)
+                    byte += 1
+        i += n
+        xx += n
+        if xx == fw:
+            xx = 0
+            yy += 1
+    fr[_FR_XX] = xx
+    fr[_FR_YY] = yy
+    pos += stop - start
+    fr[_FR_POS] = pos
+    return pos
+
+
+# prefix[] value marking an LZW root entry (a single colour index)
+_LZW_ROOT = const(0xFFFF)
+
+
+# Expand LZW dictionary entry code into stack, writing backwards from the
+# end so the string ends up in order in stack[sp:]. Returns sp.
+@micropython.viper
+def _unwind(prefix: ptr16, suffix: ptr8, stack: ptr8, code: int) -> int:
+    sp = 4096
+    while code != _LZW_ROOT:
+        sp -= 1
+        stack[sp] = suffix[code]
+        code = prefix[code]
+    return sp
+
+
+# Widen each bit of byte b (MSB first) to `scale` bits, for scaled()
+def _expand_bits(b, scale):
+    v = 0
+    for i in range(8):
+        v <<= scale
+        if b & (0x80 >> i):
+            v |= (1 << scale) - 1
+    return v
+
+
+# scale=2 is the usual case, so its expansions are precomputed
+_BIT_EXPAND_X2 = array.array("H", [_expand_bits(b, 2) for b in range(256)])
+
 # Subclassing FrameBuffer provides support for graphics primitives
 # http://docs.micropython.org/en/latest/pyboard/library/framebuf.html
 class SSD1306(framebuf.FrameBuffer):
@@ -36,6 +195,29 @@ class SSD1306(framebuf.FrameBuffer):
         self.external_vcc = external_vcc
         self.pages = self.height // 8
         self.buffer = bytearray(self.pages * self.width)
+        # MONO_VLSB page and bit mask of every display row
+        self._page_lut = bytes(yy >> 3 for yy in range(self.height))
+        self._bit_lut = bytes(1 << (yy & 7) for yy in range(self.height))
+        x0 = 0
+        x1 = self.width - 1
+        if self.width != 128:
+            # narrow displays use centred columns
+            col_offset = (128 - self.width) // 2
+            x0 += col_offset
+            x1 += col_offset
+        # Address window sent by show(), as Co=1, D/C#=0 control/command pairs
+        self._show_cmds = bytearray((
+            0x80, SET_COL_ADDR,
+            0x80, x0,
+            0x80, x1,
+            0x80, SET_PAGE_ADDR,
+            0x80, 0,
+            0x80, self.pages - 1,
+        ))
+        # Rows show() pushes to the display; reset to the full screen after
+        # each push, so only gif() narrows it for the frames it has drawn
+        self._dirty_y0 = 0
+        self._dirty_y1 = self.height - 1
         super().__init__(self.buffer, self.width, self.height, framebuf.MONO_VLSB)
         self.init_display()
 
@@ -106,12 +288,15 @@ class SSD1306(framebuf.FrameBuffer):
         - Supports non-interlaced GIFs only.
         - Blocking: does not return until all loops are done.
         """
-        import time
-
-        # Read entire GIF file
+        # The file is read as it plays rather than loaded into RAM
         with open(filename, "rb") as f:
-            data = f.read()
+            self._gif(f, x, y, loop, delay_ms, clear, crop)
+
+    def _gif(self, f, x, y, loop, delay_ms, clear, crop):
+        import time
+        from struct import unpack_from
 
+        data = f.read(13)
         if len(data) < 13:
             return
 
@@ -120,292 +305,314 @@ class SSD1306(framebuf.FrameBuffer):
             return
 
         # Logical Screen Descriptor
-        ls_width  = data[6] | (data[7] << 8)
-        ls_height = data[8] | (data[9] << 8)
+        ls_width, ls_height = unpack_from("<HH", data, 6)
         packed    = data[10]
         bg_color_index = data[11]
         # pixel_aspect = data[12]  # not used
 
-        # Global Color Table
-        gct_flag = (packed & 0x80) != 0
-        gct_size = 0
-        global_color_table = None
-
+        # Global Color Table: colours are not needed on a 1-bit display
         p = 13  # position after header + LSD
-        if gct_flag:
-            gct_size = 1 << ((packed & 0x07) + 1)
-            gct_bytes = 3 * gct_size
-            global_color_table = data[p:p + gct_bytes]
-            p += gct_bytes
-
-        # Helper: read GIF sub-blocks into one bytes object
-        def _read_subblocks(pos):
-            img_data = bytearray()
-            length = len(data)
-            while pos < length:
-                block_len = data[pos]
-                pos += 1
-                if block_len == 0:
+        if packed & _CT_FLAG:
+            p += 3 * (1 << ((packed & _CT_SIZE_MASK) + 1))
+
+        # Helper: skip the GIF sub-blocks at the current file position
+        def _skip_subblocks():
+            while True:
+                n = f.read(1)
+                if not n or not n[0]:
                     break
-                img_data.extend(data[pos:pos + block_len])
-                pos += block_len
-            return bytes(img_data), pos
-
-        # Helper: LZW decode the image data into colour indices
-        def _lzw_decode(img_bytes, min_code_size, expected_pixels):
+                f.seek(n[0], 1)
+
+        # Helper: read the image data sub-blocks at the current file
+        # position into img, length bytes and terminator included, growing
+        # img if this frame needs more room. Returns img and the length.
+        def _read_subblocks(img):
+            img_mv = memoryview(img)
+            if not f.readinto(img_mv[0:1]):
+                return img, 0
+            pos = 0
+            n = img[0]
+            while n:
+                # read the block together with the next length byte
+                end = pos + n + 2
+                if end > len(img):
+                    grown = bytearray(max(end, 2 * len(img)))
+                    grown[:pos + 1] = img[:pos + 1]
+                    img = grown
+                    img_mv = memoryview(img)
+                got = f.readinto(img_mv[pos + 1:end]) or 0
+                if got < n + 1:
+                    # truncated file: keep what was read
+                    return img, pos + 1 + got
+                pos += n + 1
+                n = img[pos]
+            return img, pos + 1
+
+        buf = self.buffer
+        # Frame parameters, followed by the display row lookup for _blit_run
+        page_lut = self._page_lut
+        bit_lut = self._bit_lut
+        fr = array.array("i", [0] * _FR_ROWS + [
+            (page_lut[yy] * self.width) << 8 | bit_lut[yy] for yy in range(self.height)
+        ])
+        rd = array.array("i", [0] * _RD_LEN)
+
+        # LZW dictionary and unwind stack, shared by every frame, and the
+        # buffer for a frame's image data, which grows to the largest frame
+        prefix = array.array("H", [_LZW_ROOT] * 4096)
+        suffix = bytearray(4096)
+        stack = bytearray(4096)
+        img_data = bytearray(1024)
+
+        # Helper: LZW decode the image data sub-blocks in img[:length],
+        # drawing each decoded string into the frame described by fr rather
+        # than buffering the frame
+        def _lzw_decode(img, length, min_code_size, bg, trans, fr, rd):
             # Simple GIF LZW decoder, up to 12-bit codes
             if min_code_size < 2 or min_code_size > 8:
                 # Fallback: just truncate raw bytes
-                return list(img_bytes[:expected_pixels])
+                classes = bytearray(256)
+                for i in range(256):
+                    classes[i] = _PIX_KEEP if i == trans else _PIX_ON if i != bg else _PIX_OFF
+                pos = 0
+                while pos < length and fr[_FR_POS] < fr[_FR_STOP]:
+                    block_len = img[pos]
+                    pos += 1
+                    if block_len == 0:
+                        break
+                    run = bytearray(img[pos:min(pos + block_len, length)])
+                    for i in range(len(run)):
+                        run[i] = classes[run[i]]
+                    fr[_FR_RUN_END] = len(run)
+                    _blit_run(buf, run, 0, fr)
+                    pos += block_len
+                return
 
             clear_code = 1 << min_code_size
             end_code = clear_code + 1
             code_size = min_code_size + 1
             max_code_size = 12
 
-            # Dictionary: code -> [indices...]
-            dictionary = [[i] for i in range(clear_code)] + [None, None]
-
-            bit_pos = 0
-            data_len = len(img_bytes)
-            output = []
-            prev = None
-
-            def _next_code(bit_pos, code_size):
-                byte_pos = bit_pos >> 3
-                if byte_pos >= data_len:
-                    return None, bit_pos
-                raw = 0
-                bits_read = 0
-                shift = 0
-                while bits_read < code_size and byte_pos < data_len:
-                    b = img_bytes[byte_pos]
-                    available = 8 - (bit_pos & 7)
-                    take = code_size - bits_read
-                    if take > available:
-                        take = available
-                    mask = (1 << take) - 1
-                    v = (b >> (bit_pos & 7)) & mask
-                    raw |= v << shift
-                    bits_read += take
-                    shift += take
-                    bit_pos += take
-                    byte_pos = bit_pos >> 3
-                if bits_read != code_size:
-                    return None, bit_pos
-                return raw, bit_pos
-
-            # Initial code
-            code, bit_pos = _next_code(bit_pos, code_size)
-            if code is None:
-                return output
-
-            if code == clear_code:
-                dictionary = [[i] for i in range(clear_code)] + [None, None]
-                code_size = min_code_size + 1
-                code, bit_pos = _next_code(bit_pos, code_size)
-                if code is None or code == end_code:
-                    return output
-
-            if code == end_code:
-                return output
-            if code >= len(dictionary) or dictionary[code] is None:
-                return output
-
-            prev = dictionary[code][:]
-            output.extend(prev)
-
-            while len(output) < expected_pixels:
-                code, bit_pos = _next_code(bit_pos, code_size)
-                if code is None:
+            # Dictionary as prefix/suffix arrays: entry n is entry prefix[n]
+            # followed by byte suffix[n]. Codes below clear_code are roots,
+            # which hold the pixel class of their colour index. The arrays
+            # are reused across frames, so the roots are reset every time.
+            for i in range(clear_code):
+                prefix[i] = _LZW_ROOT
+                suffix[i] = _PIX_KEEP if i == trans else _PIX_ON if i != bg else _PIX_OFF
+            dict_len = end_code + 1
+
+            # Entries are unwound into the top of the stack by _unwind
+            fr[_FR_RUN_END] = 4096
+
+            rd[_RD_POS] = 0
+            rd[_RD_LEFT] = 0
+            rd[_RD_ACC] = 0
+            rd[_RD_NBITS] = 0
+            rd[_RD_END] = length
+
+            # Locals are much cheaper than closure and global lookups
+            dst = buf
+            read_code = _read_code
+            blit_run = _blit_run
+            unwind = _unwind
+
+            stop_at = fr[_FR_STOP]
+            out_pos = 0
+            prev = -1
+            first = 0
+
+            while out_pos < stop_at:
+                code = read_code(img, rd, code_size)
+                if code < 0:
                     break
 
                 if code == clear_code:
-                    dictionary = [[i] for i in range(clear_code)] + [None, None]
                     code_size = min_code_size + 1
-                    code, bit_pos = _next_code(bit_pos, code_size)
-                    if code is None or code == end_code:
-                        break
-                    if code >= len(dictionary) or dictionary[code] is None:
-                        cur = []
-                    else:
-                        cur = dictionary[code][:]
-                    output.extend(cur)
-                    prev = cur[:]
+                    dict_len = end_code + 1
+                    prev = -1
                     continue
 
                 if code == end_code:
                     break
 
-                if code < len(dictionary) and dictionary[code] is not None:
-                    cur = dictionary[code][:]
-                elif code == len(dictionary):
-                    # KwKwK case
-                    cur = prev[:] + [prev[0]]
-                else:
+                if code == dict_len and prev >= 0:
+                    # KwKwK case: the code is the entry about to be added,
+                    # previous string plus its own first byte, so add it now
+                    prefix[code] = prev
+                    suffix[code] = first
+                elif code >= dict_len:
                     # Invalid code
                     break
 
-                output.extend(cur)
-                dictionary.append(prev[:] + [cur[0]])
-                
-                if len(dictionary) == (1 << code_size) and code_size < max_code_size:
-                    code_size += 1
+                sp = unwind(prefix, suffix, stack, code)
+                first = stack[sp]
+
+                out_pos = blit_run(dst, stack, sp, fr)
 
-                prev = cur[:]
+                if prev >= 0 and dict_len < 4096:
+                    prefix[dict_len] = prev
+                    suffix[dict_len] = first
+                    dict_len += 1
+                    if dict_len == (1 << code_size) and code_size < max_code_size:
+                        code_size += 1
 
-            return output[:expected_pixels]
+                prev = code
 
         # Animation loop
         loops_done = 0
         infinite = loop < 0
-        start_pos = p  # where the blocks start
+        start_pos = p  # file position where the blocks start
+
+        # Cache bound methods and attributes used once per frame
+        show = self.show
+        fill_rect = self.fill_rect
+        sleep_ms = time.sleep_ms
+        buf_w = self.width
+        buf_h = self.height
+        first_frame = True
+
+        # Collect once before playback and leave per-frame garbage to the
+        # automatic collector rather than scanning the heap every loop
+        gc.collect()
 
         while infinite or loops_done < loop:
-            p = start_pos
+            f.seek(start_pos)
             transparency_index = None
             frame_delay_ms = 0
 
-            while p < len(data):
-                block_type = data[p]
-                p += 1
+            while True:
+                block = f.read(1)
+                if not block:
+                    break
+                block_type = block[0]
 
                 # Trailer: end of GIF
-                if block_type == 0x3B:
+                if block_type == _GIF_TRAILER:
                     break
 
                 # Extension block
-                if block_type == 0x21:
-                    label = data[p]
-                    p += 1
+                if block_type == _GIF_EXT:
+                    block = f.read(2)
+                    if len(block) < 2:
+                        break
+                    label = block[0]
+                    block_size = block[1]
 
                     # Graphics Control Extension (gives us delay + transparency)
-                    if label == 0xF9:
-                        block_size = data[p]
-                        p += 1
-                        if block_size == 4:
-                            packed_fields = data[p]
-                            p += 1
-                            delay_lo = data[p]
-                            delay_hi = data[p + 1]
-                            p += 2
-                            trans_index = data[p]
-                            p += 1
-                            terminator = data[p]
-                            p += 1
-
-                            frame_delay_ms = (delay_hi << 8 | delay_lo) * 10
-                            if frame_delay_ms <= 0:
-                                frame_delay_ms = 50  # sensible default
-
-                            if packed_fields & 0x01:
-                                transparency_index = trans_index
-                        else:
-                            # Skip odd GCE sizes
-                            sub_len = data[p]
-                            p += 1 + sub_len
-                            while sub_len:
-                                sub_len = data[p]
-                                p += 1 + sub_len
-
+                    if label == _GIF_GCE and block_size == 4:
+                        block = f.read(5)  # includes block terminator
+                        if len(block) < 5:
+                            break
+                        packed_fields = block[0]
+                        frame_delay_ms = unpack_from("<H", block, 1)[0] * 10
+                        trans_index = block[3]
+
+                        if frame_delay_ms <= 0:
+                            frame_delay_ms = 50  # sensible default
+
+                        if packed_fields & _GCE_TRANS:
+                            transparency_index = trans_index
                     else:
-                        # Skip other extension types
-                        sub_len = data[p]
-                        p += 1
-                        while sub_len:
-                            p += sub_len
-                            sub_len = data[p]
-                            p += 1
+                        # Skip other extension types and odd GCE sizes
+                        f.seek(block_size, 1)
+                        _skip_subblocks()
 
                     continue
 
                 # Image Descriptor
-                if block_type == 0x2C:
-                    left = data[p] | (data[p + 1] << 8)
-                    top = data[p + 2] | (data[p + 3] << 8)
-                    width = data[p + 4] | (data[p + 5] << 8)
-                    height = data[p + 6] | (data[p + 7] << 8)
-                    packed_fields = data[p + 8]
-                    p += 9
+                if block_type == _GIF_IMG:
+                    block = f.read(10)  # includes LZW minimum code size
+                    if len(block) < 10:
+                        break
+                    left, top, width, height = unpack_from("<HHHH", block)
+                    packed_fields = block[8]
 
-                    lct_flag = (packed_fields & 0x80) != 0
-                    interlace = (packed_fields & 0x40) != 0
+                    lct_flag = (packed_fields & _CT_FLAG) != 0
+                    interlace = (packed_fields & _INTERLACE) != 0
+
+                    if lct_flag:
+                        # Local Color Table sits before the LZW code size
+                        f.seek(3 * (1 << ((packed_fields & _CT_SIZE_MASK) + 1)) - 1, 1)
+                        block = f.read(1)
+                        if not block:
+                            break
+                        lzw_min_code_size = block[0]
+                    else:
+                        lzw_min_code_size = block[9]
 
                     # Interlaced GIFs not supported: skip them
                     if interlace:
-                        if lct_flag:
-                            lct_size = 1 << ((packed_fields & 0x07) + 1)
-                            p += 3 * lct_size
-                        # skip image sub-blocks
-                        _, p = _read_subblocks(p + 1)
+                        _skip_subblocks()
                         continue
 
-                    local_color_table = None
-                    if lct_flag:
-                        lct_size = 1 << ((packed_fields & 0x07) + 1)
-                        lct_bytes = 3 * lct_size
-                        local_color_table = data[p:p + lct_bytes]
-                        p += lct_bytes
-
-                    lzw_min_code_size = data[p]
-                    p += 1
+                    dst_x0 = x + left
+                    dst_y0 = y + top
 
-                    img_bytes, p = _read_subblocks(p)
-                    expected_pixels = width * height
-                    indices = _lzw_decode(img_bytes, lzw_min_code_size, expected_pixels)
+                    # Display rows touched by this frame
+                    dirty_y0 = buf_h
+                    dirty_y1 = -1
 
                     # Draw the frame
-                                        # Draw the frame
                     if clear:
-                        self.fill_rect(x + left, y + top, width, height, 0)
-
-                    pos = 0
-                    bg_idx = bg_color_index  # for our 1-bit mapping
-
-                    dst_x0 = x + left
-                    dst_y0 = y + top
+                        fill_rect(dst_x0, dst_y0, width, height, 0)
+                        dirty_y0 = max(0, dst_y0)
+                        dirty_y1 = min(buf_h - 1, dst_y0 + height - 1)
 
+                    # Visible area in display coordinates, inclusive
+                    cx0, cy0, cx1, cy1 = 0, 0, buf_w - 1, buf_h - 1
                     if crop is not None:
-                        cx0, cy0, cx1, cy1 = crop
+                        cx0 = max(cx0, crop[0])
+                        cy0 = max(cy0, crop[1])
+                        cx1 = min(cx1, crop[2])
+                        cy1 = min(cy1, crop[3])
+
+                    # ...and the same box in frame coordinates
+                    fx0 = max(0, cx0 - dst_x0)
+                    fy0 = max(0, cy0 - dst_y0)
+                    fx1 = min(width - 1, cx1 - dst_x0)
+                    fy1 = min(height - 1, cy1 - dst_y0)
+
+                    # Frames entirely outside it need not be read or decoded
+                    if fx0 > fx1 or fy0 > fy1:
+                        _skip_subblocks()
                     else:
-                        # values unused when crop is None
-                        cx0 = cy0 = cx1 = cy1 = 0
-
-                    for yy in range(height):
-                        y_pix = dst_y0 + yy
-                        for xx in range(width):
-                            if pos >= len(indices):
-                                break
-                            idx = indices[pos]
-                            pos += 1
-
-                            if (transparency_index is not None) and (idx == transparency_index):
-                                # Leave existing pixel as-is
-                                continue
-
-                            x_pix = dst_x0 + xx
-
-                            if crop is not None:
-                                if (x_pix < cx0) or (x_pix > cx1) or (y_pix < cy0) or (y_pix > cy1):
-                                    continue
-
-                            col = 0
-                            if idx != bg_idx:
-                                col = 1
-
-                            self.pixel(x_pix, y_pix, col)
-
-                    self.show()
+                        img_data, img_len = _read_subblocks(img_data)
+
+                        fr[_FR_W] = width
+                        fr[_FR_X0] = dst_x0
+                        fr[_FR_Y0] = dst_y0
+                        fr[_FR_FX0] = fx0
+                        fr[_FR_FY0] = fy0
+                        fr[_FR_FX1] = fx1
+                        fr[_FR_FY1] = fy1
+                        # Rows below the visible box are never decoded
+                        fr[_FR_STOP] = (fy1 + 1) * width
+                        fr[_FR_POS] = 0
+                        fr[_FR_XX] = 0
+                        fr[_FR_YY] = 0
+
+                        trans_idx = -1 if transparency_index is None else transparency_index
+                        _lzw_decode(img_data, img_len, lzw_min_code_size, bg_color_index, trans_idx, fr, rd)
+                        dirty_y0 = min(dirty_y0, dst_y0 + fy0)
+                        dirty_y1 = max(dirty_y1, dst_y0 + fy1)
+
+                    # The first frame pushes the whole screen in case
+                    # anything else was drawn before gif() was called
+                    if not first_frame:
+                        self._dirty_y0 = dirty_y0
+                        self._dirty_y1 = dirty_y1
+                    first_frame = False
+                    show()
 
                     
                     # Frame delay: override if user provided delay_ms
                     d = delay_ms if (delay_ms is not None) else frame_delay_ms
                     if d <= 0:
                         d = 50
-                    time.sleep_ms(d)
+                    sleep_ms(d)
 
                     continue
-            gc.collect()
             loops_done += 1
             
             
@@ -413,21 +620,54 @@ class SSD1306(framebuf.FrameBuffer):
         return self.gif(filename, x, y, loop, delay_ms, clear, crop)
 
 
+    def scaled(self, text, x, y, scale=2, colr=1):
+        temp_w = len(text) * 8
+        temp_h = 8
+        src_w = temp_w // 8  # bytes per source row
+        temp_buf = bytearray(src_w * temp_h)
+        temp_fb = framebuf.FrameBuffer(temp_buf, temp_w, temp_h, framebuf.MONO_HLSB)
+        temp_fb.text(text, 0, 0)
+
+        # Widen every source byte to `scale` bytes, repeat each row `scale`
+        # times, then draw the whole block with one blit. For colr=0 the
+        # bitmap is inverted so the text bits are the ones that get drawn.
+        inv = 0 if colr else 0xFF
+        row_w = src_w * scale
+        row = bytearray(row_w)
+        scaled_buf = bytearray(row_w * temp_h * scale)
+        pos = 0
+        for iy in range(temp_h):
+            for ib in range(src_w):
+                b = temp_buf[iy * src_w + ib]
+                v = _BIT_EXPAND_X2[b] if scale == 2 else _expand_bits(b, scale)
+                o = (ib + 1) * scale
+                for _ in range(scale):
+                    o -= 1
+                    row[o] = (v & 0xFF) ^ inv
+                    v >>= 8
+            for _ in range(scale):
+                scaled_buf[pos:pos + row_w] = row
+                pos += row_w
+
+        scaled_fb = framebuf.FrameBuffer(scaled_buf, temp_w * scale, temp_h * scale, framebuf.MONO_HLSB)
+        self.blit(scaled_fb, x, y, 1 if inv else 0)
+
     def show(self):
-        x0 = 0
-        x1 = self.width - 1
-        if self.width != 128:
-            # narrow displays use centred columns
-            col_offset = (128 - self.width) // 2
-            x0 += col_offset
-            x1 += col_offset
-        self.write_cmd(SET_COL_ADDR)
-        self.write_cmd(x0)
-        self.write_cmd(x1)
-        self.write_cmd(SET_PAGE_ADDR)
-        self.write_cmd(0)
-        self.write_cmd(self.pages - 1)
-        self.write_data(self.buffer)
+        p0 = self._dirty_y0 >> 3
+        p1 = self._dirty_y1 >> 3
+        self._dirty_y0 = 0
+        self._dirty_y1 = self.height - 1
+        if p0 > p1:
+            # nothing changed
+            return
+        cmds = self._show_cmds
+        cmds[9] = p0
+        cmds[11] = p1
+        self.write_cmds(cmds)
+        if p0 == 0 and p1 == self.pages - 1:
+            self.write_data(self.buffer)
+        else:
+            self.write_data(memoryview(self.buffer)[p0 * self.width:(p1 + 1) * self.width])
 
 
 class SSD1306_I2C(SSD1306):
@@ -443,28 +683,13 @@ class SSD1306_I2C(SSD1306):
         self.temp[1] = cmd
         self.i2c.writeto(self.addr, self.temp)
 
+    def write_cmds(self, cmds):
+        # cmds holds control/command byte pairs, sent in one transaction
+        self.i2c.writeto(self.addr, cmds)
+
     def write_data(self, buf):
         self.write_list[1] = buf
         self.i2c.writevto(self.addr, self.write_list)
-        
-    def scaled(self, text, x, y, scale=2, colr=1):
-        clr = 0
-        temp_w = len(text) * 8
-        temp_h = 8
-        temp_buf = bytearray((temp_w // 8) * temp_h)
-        temp_fb = framebuf.FrameBuffer(temp_buf, temp_w, temp_h, framebuf.MONO_HLSB)
-        temp_fb.fill(0)
-        temp_fb.text(text, 0, 0)
-        
-        for ix in range(temp_w):
-            for iy in range(temp_h):
-                if temp_fb.pixel(ix, iy):
-                    x0 = x + ix * scale
-                    y0 = y + iy * scale
-                    # draw block
-                    for dx in range(scale):
-                        for dy in range(scale):
-                            self.pixel(x0 + dx, y0 + dy, colr)
 
 
 class SSD1306_SPI(SSD1306):
@@ -477,6 +702,7 @@ class SSD1306_SPI(SSD1306):
         self.dc = dc
         self.res = res
         self.cs = cs
+        self.cmd_buf = bytearray(6)  # command bytes of write_cmds()
         import time
 
         self.res(1)
@@ -494,6 +720,23 @@ class SSD1306_SPI(SSD1306):
         self.spi.write(bytearray([cmd]))
         self.cs(1)
 
+    def write_cmds(self, cmds):
+        # cmds holds I2C style control/command byte pairs; SPI only needs
+        # the command bytes, which go out in one transaction. MicroPython
+        # does not support stepped slices, so copy them out by hand.
+        n = len(cmds) // 2
+        if len(self.cmd_buf) != n:
+            self.cmd_buf = bytearray(n)
+        cmd_buf = self.cmd_buf
+        for i in range(n):
+            cmd_buf[i] = cmds[2 * i + 1]
+        self.spi.init(baudrate=self.rate, polarity=0, phase=0)
+        self.cs(1)
+        self.dc(0)
+        self.cs(0)
+        self.spi.write(cmd_buf)
+        self.cs(1)
+
     def write_data(self, buf):
         self.spi.init(baudrate=self.rate, polarity=0, phase=0)
         self.cs(1)
@@ -501,23 +744,4 @@ class SSD1306_SPI(SSD1306):
         self.cs(0)
         self.spi.write(buf)
         self.cs(1)
-        
-    def scaled(self, text, x, y, scale=2, colr=1):
-        clr = 0
-        temp_w = len(text) * 8
-        temp_h = 8
-        temp_buf = bytearray((temp_w // 8) * temp_h)
-        temp_fb = framebuf.FrameBuffer(temp_buf, temp_w, temp_h, framebuf.MONO_HLSB)
-        temp_fb.fill(0)
-        temp_fb.text(text, 0, 0)
-        
-        for ix in range(temp_w):
-            for iy in range(temp_h):
-                if temp_fb.pixel(ix, iy):
-                    x0 = x + ix * scale
-                    y0 = y + iy * scale
-                    # draw block
-                    for dx in range(scale):
-                        for dy in range(scale):
-                            self.pixel(x0 + dx, y0 + dy, colr)
 